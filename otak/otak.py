@@ -4,10 +4,489 @@
 """Provide a class for AK algorithms.
 """
 
+import copy
+import multiprocessing
+
 import openturns as ot
 import numpy as np
 
 from abc import ABC, abstractmethod
+from scipy.linalg import solve_triangular
+from scipy.spatial.distance import cdist
+from scipy.spatial import cKDTree
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# OpenTURNS comparison operators, indexed by their code in the reduction kernels,
+# and their NumPy counterparts
+_COMPARISON_OPERATORS = ('Less', 'LessOrEqual', 'Greater', 'GreaterOrEqual', 'Equal')
+_COMPARISON_UFUNCS = (np.less, np.less_equal, np.greater, np.greater_equal, np.equal)
+
+
+def _compute_u_numpy(mean, var, S, evaluated_mask, out):
+    """
+    Function computing the U criterion in out, evaluated samples are given an infinite value
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(np.abs(mean - S), np.sqrt(var), out=out)
+    out[evaluated_mask] = np.inf
+
+
+def _weighted_indicator_numpy(y, S, weights, op_code):
+    """
+    Function summing the weights of the samples whose response y compares to S according to op_code
+    """
+    return _COMPARISON_UFUNCS[op_code](y, S).dot(weights)
+
+
+if njit is not None:
+    # fastmath flags keeping the IEEE semantics of inf and nan, and divisions by zero returning
+    # inf or nan as in NumPy
+    _FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+    @njit(parallel=True, fastmath=_FASTMATH, error_model='numpy')
+    def _compute_u(mean, var, S, evaluated_mask, out):
+        """
+        Kernel computing the U criterion in out, evaluated samples are given an infinite value
+        """
+        for i in prange(mean.shape[0]):
+            if evaluated_mask[i]:
+                out[i] = np.inf
+            else:
+                out[i] = abs(mean[i] - S)/np.sqrt(var[i])
+
+    @njit(parallel=True, fastmath=_FASTMATH, error_model='numpy')
+    def _weighted_indicator(y, S, weights, op_code):
+        """
+        Kernel summing the weights of the samples whose response y compares to S according to op_code
+        """
+        total = 0.
+        for i in prange(y.shape[0]):
+            if op_code == 0:
+                failed = y[i] < S
+            elif op_code == 1:
+                failed = y[i] <= S
+            elif op_code == 2:
+                failed = y[i] > S
+            elif op_code == 3:
+                failed = y[i] >= S
+            else:
+                failed = y[i] == S
+            if failed:
+                total += weights[i]
+        return total
+
+    @njit(parallel=True, fastmath=_FASTMATH, error_model='numpy')
+    def _fused_u(K_star, V, alpha, trend, H, G, k_diag, S, evaluated_mask, out):
+        """
+        Kernel computing the U criterion in out directly from the kriging quantities, in a single
+        pass over the samples, V being the solution of L V^T = K_star^T, trend the trend at the
+        samples and H, G the trend basis functions at the samples and the whitened trend of the
+        DoE, both multiplied by the inverse of the R factor of the latter
+        """
+        n, N = K_star.shape
+        p = H.shape[1]
+        for i in prange(n):
+            if evaluated_mask[i]:
+                out[i] = np.inf
+                continue
+            mean = trend[i]
+            var = k_diag[i]
+            for j in range(N):
+                mean += K_star[i, j]*alpha[j]
+                var -= V[i, j]*V[i, j]
+            # Correction due to the estimation of the trend coefficients
+            for a in range(p):
+                w = H[i, a]
+                for j in range(N):
+                    w -= G[j, a]*V[i, j]
+                var += w*w
+            out[i] = abs(mean - S)/np.sqrt(max(var, 0.))
+
+else:
+    _fused_u = None
+    _compute_u = _compute_u_numpy
+    _weighted_indicator = _weighted_indicator_numpy
+
+
+def _ensemble_worker(task):
+    """
+    Function running one replication of an algorithm in a worker process
+    
+    :task: tuple of the algorithm, unpickled in the worker, and of the seed of the OpenTURNS
+        random generator of the replication
+    """
+    algorithm, seed = task
+    ot.RandomGenerator.SetSeed(seed)
+    algorithm.compute_proba()
+    return algorithm.proba, algorithm.cv, algorithm.nb_eval
+
+
+def _get_class_name(ot_object):
+    """
+    Return the class name of an OpenTURNS object, looking through interface classes
+    
+    :ot_object: OpenTURNS object, e.g. :py:class:`openturns.ComparisonOperator`
+    """
+    if hasattr(ot_object, 'getImplementation'):
+        return ot_object.getImplementation().getClassName()
+    return ot_object.getClassName()
+
+
+def _kernel_cross(cov_model,A,B):
+    """
+    Function computing the covariance matrix between two sets of points
+    
+    Squared exponential and absolute exponential models are evaluated from the scaled
+    distances computed by SciPy, other covariance models are evaluated by OpenTURNS.
+    
+    :cov_model: covariance model of kriging
+    
+    :A: array of points of shape (nA, dim)
+    
+    :B: array of points of shape (nB, dim)
+    """
+    name = _get_class_name(cov_model)
+    if name not in ('SquaredExponential', 'AbsoluteExponential'):
+        return np.asarray(cov_model.computeCrossCovariance(ot.Sample(A), ot.Sample(B)))
+    
+    scale = np.asarray(cov_model.getScale())
+    amplitude = cov_model.getAmplitude()[0]
+    if name == 'SquaredExponential':
+        K = cdist(A/scale, B/scale, 'sqeuclidean')
+        K *= -0.5
+    else:
+        K = cdist(A/scale, B/scale, 'cityblock')
+        K *= -1.
+    np.exp(K, out=K)
+    K *= amplitude**2
+    return K
+
+
+# Nugget, relative to the largest variance, added to the diagonal of a covariance matrix whose
+# Cholesky factorization fails, doubled until the factorization succeeds, as done by
+# openturns.GeneralLinearModelAlgorithm on the covariance matrix with unit amplitude
+_STARTING_NUGGET = 1e-13
+_MAXIMAL_NUGGET = 1e5
+
+# Tolerance, relative to the largest DoE response, on the interpolation residual of the kriging
+# predictor, and maximal number of iterative refinements of its weights
+_INTERPOLATION_TOLERANCE = 1e-8
+_MAX_REFINEMENTS = 3
+
+
+def _regularized_cholesky(K):
+    """
+    Function computing the Cholesky factor of a covariance matrix, adding a growing nugget to
+    its diagonal when the matrix is numerically singular
+    
+    :K: covariance matrix
+    
+    Returns:
+        L: lower Cholesky factor of K plus the nugget
+        nugget: float, nugget added to the diagonal of K
+    """
+    nugget = 0.
+    scaling = _STARTING_NUGGET*max(np.diag(K).max(), np.finfo(np.float64).tiny)
+    maximal_scaling = _MAXIMAL_NUGGET*scaling/_STARTING_NUGGET
+    while True:
+        try:
+            return np.linalg.cholesky(K + nugget*np.eye(K.shape[0])), nugget
+        except np.linalg.LinAlgError:
+            if scaling > maximal_scaling:
+                raise
+            nugget += scaling
+            scaling *= 2
+
+
+class _KrigingPredictor:
+    """
+    Kriging predictor with frozen hyperparameters, computed with NumPy
+    
+    The Cholesky factor of the DoE covariance matrix is kept so that a point can be
+    added to the DoE by a rank-one update, without running a new
+    :py:class:`openturns.KrigingAlgorithm`. The DoE covariance matrix is computed as the
+    covariance with the prediction points, so that the predictor interpolates the DoE, and
+    the kriging weights are refined when the interpolation residual is too large.
+    
+    :cov_model: covariance model of kriging with fitted hyperparameters
+    
+    :basis: basis of kriging model
+    
+    :DoE_inputs: :py:class:`openturns.Sample` of DoE inputs
+    
+    :DoE_responses: :py:class:`openturns.Sample` of DoE responses
+    
+    :samples: array of samples on which predictions are repeatedly required, optional
+    
+    :max_size: integer, expected maximal size of the DoE, for which the covariance between the
+        samples and the DoE is allocated, optional
+    
+    """
+
+    def __init__(self,cov_model,basis,DoE_inputs,DoE_responses,samples=None,max_size=0):
+        self.cov_model = cov_model
+        self.basis = basis
+        self._basis_functions = [basis.build(i) for i in range(basis.getSize())]
+        self.max_size = max_size
+        self.X = np.array(DoE_inputs, dtype=np.float64)
+        self.y = np.array(DoE_responses, dtype=np.float64).ravel()
+        self.F = self._trend(self.X)
+        self._factorize(self._cross_covariance(self.X, self.X))
+        
+        self.samples = None
+        self._prediction = None
+        if samples is not None:
+            self.set_samples(samples)
+
+    def set_samples(self,samples):
+        """
+        Function caching the covariance between the samples and the DoE
+        
+        :samples: array of samples on which predictions are repeatedly required
+        """
+        self.samples = np.asarray(samples, dtype=np.float64)
+        self._prediction = None
+        # The covariance with the DoE is stored in a column-major buffer with one column per possible
+        # DoE point, of which _K_star is the contiguous view on the current DoE: the memory of the
+        # columns is only committed when they are filled
+        N = self.X.shape[0]
+        self._K_buffer = np.empty((self.samples.shape[0], max(self.max_size, N)), order='F')
+        self._K_buffer[:, :N] = self._cross_covariance(self.samples, self.X)
+        self._K_star = self._K_buffer[:, :N]
+        self._F_star = self._trend(self.samples)
+        self._k_diag = self._prior_variance(self.samples)
+
+    def _trend(self,X):
+        """
+        Function evaluating the trend basis functions, returns an array of shape (len(X), basis size)
+        
+        :X: array of points
+        """
+        X = np.asarray(X)
+        F = np.empty((X.shape[0], len(self._basis_functions)))
+        if self._basis_functions:
+            sample = ot.Sample(X)
+            for i, function in enumerate(self._basis_functions):
+                F[:, i] = np.asarray(function(sample)).ravel()
+        return F
+
+    def _cross_covariance(self,A,B):
+        """
+        Function computing the covariance matrix between two sets of points
+        
+        :A: array of points
+        
+        :B: array of points
+        """
+        return _kernel_cross(self.cov_model, np.asarray(A, dtype=np.float64), np.asarray(B, dtype=np.float64))
+
+    def _prior_variance(self,X):
+        """
+        Function computing the prior variance of the process at the points X
+        
+        :X: array of points
+        """
+        if self.cov_model.isStationary():
+            return np.full(len(X), self.cov_model.getAmplitude()[0]**2)
+        return np.array([self.cov_model(x, x)[0, 0] for x in np.asarray(X)])
+
+    def _factorize(self,K):
+        """
+        Function computing the Cholesky factor of the DoE covariance matrix, the whitened trend and
+        responses, and solving the kriging system
+        
+        :K: covariance matrix of the DoE, without nugget
+        """
+        self.L, self.nugget = _regularized_cholesky(K)
+        # Covariance matrix of the DoE, including the nugget
+        self.K = K + self.nugget*np.eye(K.shape[0])
+        # Trend and responses whitened by the Cholesky factor
+        self.F_tilde = solve_triangular(self.L, self.F, lower=True)
+        self.y_tilde = solve_triangular(self.L, self.y, lower=True)
+        return self._solve()
+
+    def _solve_whitened(self,r_tilde):
+        """
+        Function solving the kriging system for whitened responses
+        
+        :r_tilde: responses whitened by the Cholesky factor
+        
+        Returns:
+            beta: generalized least squares trend coefficients
+            alpha: kriging weights
+        """
+        if self.F_tilde.shape[1] > 0:
+            beta = solve_triangular(self.R, self.Q.T @ r_tilde)
+        else:
+            beta = np.empty(0)
+        alpha = solve_triangular(self.L, r_tilde - self.F_tilde @ beta, lower=True, trans='T')
+        return beta, alpha
+
+    def _solve(self):
+        """
+        Function updating the generalized least squares trend coefficients and the kriging weights
+        
+        The solution is refined while the interpolation residual of the DoE responses is larger than
+        `_INTERPOLATION_TOLERANCE` times the largest response, which happens when the covariance
+        matrix is ill-conditioned.
+        
+        Returns:
+            boolean telling whether the interpolation residual is within the tolerance
+        """
+        if self.F_tilde.shape[1] > 0:
+            self.Q, self.R = np.linalg.qr(self.F_tilde)
+        else:
+            self.Q, self.R = np.empty((self.F_tilde.shape[0], 0)), np.empty((0, 0))
+        self.beta, self.alpha = self._solve_whitened(self.y_tilde)
+        
+        tolerance = _INTERPOLATION_TOLERANCE*max(np.abs(self.y).max(), np.finfo(np.float64).tiny)
+        for i in range(_MAX_REFINEMENTS+1):
+            residual = self.y - self.K @ self.alpha - self.F @ self.beta
+            if np.abs(residual).max() <= tolerance:
+                return True
+            if i < _MAX_REFINEMENTS:
+                delta_beta, delta_alpha = self._solve_whitened(solve_triangular(self.L, residual, lower=True))
+                self.beta = self.beta + delta_beta
+                self.alpha = self.alpha + delta_alpha
+        return False
+
+    def add_point(self,x_new,y_new):
+        """
+        Function adding a point to the DoE by a rank-one update of the Cholesky factor
+        
+        :x_new: new DoE input
+        
+        :y_new: response of the limit state function at x_new
+        """
+        x_new = np.asarray(x_new, dtype=np.float64).reshape(1, -1)
+        k = self._cross_covariance(self.X, x_new).ravel()
+        c = self._cross_covariance(x_new, x_new)[0, 0] + self.nugget
+        
+        # New row of the Cholesky factor
+        v = solve_triangular(self.L, k, lower=True)
+        d = np.sqrt(max(c - v @ v, np.finfo(np.float64).eps*c))
+        n = self.L.shape[0]
+        L = np.zeros((n+1, n+1))
+        L[:n, :n] = self.L
+        L[n, :n] = v
+        L[n, n] = d
+        self.L = L
+        
+        K = np.empty((n+1, n+1))
+        K[:n, :n] = self.K
+        K[n, :n] = K[:n, n] = k
+        K[n, n] = c
+        self.K = K
+        f_new = self._trend(x_new)[0]
+        y_new = np.asarray(y_new, dtype=np.float64).ravel()[0]
+        self.F = np.vstack((self.F, f_new))
+        self.y = np.append(self.y, y_new)
+        self.F_tilde = np.vstack((self.F_tilde, (f_new - v @ self.F_tilde)/d))
+        self.y_tilde = np.append(self.y_tilde, (y_new - v @ self.y_tilde)/d)
+        self.X = np.vstack((self.X, x_new))
+        if not self._solve():
+            # rounding errors of the updates are amplified by the conditioning, the factorization is rebuilt
+            self._factorize(self.K - self.nugget*np.eye(n+1))
+        
+        if self.samples is not None:
+            self._prediction = None
+            if n+1 > self._K_buffer.shape[1]:
+                # DoE larger than expected, the buffer is doubled
+                buffer = np.empty((self._K_buffer.shape[0], 2*(n+1)), order='F')
+                buffer[:, :n] = self._K_buffer[:, :n]
+                self._K_buffer = buffer
+            self._K_buffer[:, n] = self._cross_covariance(self.samples, x_new).ravel()
+            self._K_star = self._K_buffer[:, :n+1]
+
+    def _predict(self,K_star,F,k_diag):
+        """
+        Function computing the kriging mean and marginal variance from the covariance with the DoE
+        
+        :K_star: covariance matrix between the prediction points and the DoE
+        
+        :F: trend basis functions evaluated at the prediction points
+        
+        :k_diag: prior variance at the prediction points
+        """
+        V = solve_triangular(self.L, K_star.T, lower=True)
+        mean = F @ self.beta + K_star @ self.alpha
+        var = k_diag - np.einsum('ij,ij->j', V, V)
+        if self.beta.size > 0:
+            # Correction due to the estimation of the trend coefficients
+            W = solve_triangular(self.R, F.T - self.F_tilde.T @ V, trans='T')
+            var += np.einsum('ij,ij->j', W, W)
+        return mean, np.maximum(var, 0.)
+
+    def compute_u(self,S,evaluated_mask,idx=None):
+        """
+        Function computing the U criterion at the cached samples
+        
+        Unless the prediction on all samples is already available, the kriging mean and
+        variance are not stored when numba is installed: U is computed in a single fused pass.
+        
+        :S: float, threshold of the event
+        
+        :evaluated_mask: boolean array telling which of the samples are evaluated
+        
+        :idx: array of indices of the samples, all samples if None
+        """
+        if self._prediction is None and _fused_u is not None:
+            if idx is None:
+                K_star, F, k_diag = self._K_star, self._F_star, self._k_diag
+            else:
+                K_star, F, k_diag = self._K_star[idx], self._F_star[idx], self._k_diag[idx]
+            V = np.ascontiguousarray(solve_triangular(self.L, K_star.T, lower=True).T)
+            R_inv = solve_triangular(self.R, np.eye(self.beta.size)) if self.beta.size > 0 else self.R
+            U = np.empty(K_star.shape[0])
+            _fused_u(K_star, V, self.alpha, F @ self.beta, F @ R_inv, self.F_tilde @ R_inv, k_diag, S, evaluated_mask, U)
+            return U
+        
+        mean, var = self.predict_samples(idx)
+        U = np.empty(mean.shape[0])
+        _compute_u(mean, var, S, evaluated_mask, U)
+        return U
+
+    def predict_mean(self,X):
+        """
+        Function computing the kriging mean at the points X, returns an array of shape (len(X), 1)
+        
+        :X: array or :py:class:`openturns.Sample` of points
+        """
+        X = np.asarray(X, dtype=np.float64)
+        mean = self._trend(X) @ self.beta + self._cross_covariance(X, self.X) @ self.alpha
+        return mean.reshape(-1, 1)
+
+    def predict(self,X):
+        """
+        Function computing the kriging mean and marginal variance at the points X
+        
+        :X: array or :py:class:`openturns.Sample` of points
+        """
+        X = np.asarray(X, dtype=np.float64)
+        return self._predict(self._cross_covariance(X, self.X), self._trend(X), self._prior_variance(X))
+
+    def predict_samples(self,idx=None):
+        """
+        Function computing the kriging mean and marginal variance at the cached samples
+        
+        The prediction on all samples is kept until the DoE or the samples change, and
+        is shared by all subsequent calls.
+        
+        :idx: array of indices of the samples to predict, all samples if None
+        """
+        if idx is None:
+            if self._prediction is None:
+                self._prediction = self._predict(self._K_star, self._F_star, self._k_diag)
+            return self._prediction
+        if self._prediction is not None:
+            mean, var = self._prediction
+            return mean[idx], var[idx]
+        return self._predict(self._K_star[idx], self._F_star[idx], self._k_diag[idx])
 
 
 class AK_Algorithm(ABC):
@@ -29,10 +508,35 @@ class AK_Algorithm(ABC):
     :u_criterion: float, threshold value for `u criterion`
     
     :verbose: verbosity parameter 
+    
+    :batch_size: integer, maximum number of infill points evaluated between two Kriging updates
+    
+    Attributes that can be modified after construction:
+    
+    :hyperparameters_update_period: integer, number of infill points between two optimizations of
+        the Kriging hyperparameters, 5 by default
+    
+    :batch_min_distance: float, minimal distance in the standard space between two infill points
+        of a batch, 0.5 by default
+    
+    :band_width: float, half-width, in Kriging standard deviations, of the band around the limit
+        state where infill points are searched, 3 by default
+    
+    :band_refresh_period: integer, number of iterations between two searches of the band on all
+        samples, 10 by default
+    
+    :queue_size: integer, maximal number of candidate samples kept between two band searches,
+        50 by default
+    
+    :queue_margin: float, increase of the lowest U criterion of the candidates triggering an
+        early band search, 0.5 by default
+    
+    :use_packed_mask: boolean, whether the evaluated samples are stored as a bitset rather than
+        a boolean mask, dividing the storage by 8, False by default
         
     """
 
-    def __init__(self,event,n_MC,n_DoE,sim_budget,basis,cov_model,u_criterion=2,verbose = False):
+    def __init__(self,event,n_MC,n_DoE,sim_budget,basis,cov_model,u_criterion=2,verbose = False,batch_size = 4):
         self.n_MC = n_MC
         self.n_DoE = n_DoE
         self.event = event
@@ -51,29 +555,239 @@ class AK_Algorithm(ABC):
         self.kriging_model = None
         self.verbose = verbose
         self.samples = None
+        self._samples_np = None
+        self._evaluated_mask = None
+        # store the evaluated samples as a bitset rather than a boolean mask, which divides the
+        # storage kept between iterations by 8 for very large numbers of samples; the bitset is
+        # unpacked into a boolean mask for each computation of U on all samples, so that the
+        # memory traffic of these computations is not reduced
+        self.use_packed_mask = False
+        self._eval_bits = None
         self.max_sim = sim_budget
         self.operator = event.getOperator()
+        self._op_code = _COMPARISON_OPERATORS.index(_get_class_name(self.operator))
+        # number of infill points between two optimizations of the kriging hyperparameters
+        self.hyperparameters_update_period = 5
+        self.batch_size = batch_size
+        # minimal distance in the standard space between two infill points of a batch
+        self.batch_min_distance = 0.5
+        self._isoprobtrans = self.distrib.getIsoProbabilisticTransformation()
+        # half-width, in kriging standard deviations, of the band around the limit state
+        # where infill points are searched, and number of iterations between band refreshes
+        self.band_width = 3.
+        self.band_refresh_period = 10
+        # maximal number of candidate samples kept between two band refreshes, and increase
+        # of their lowest U criterion triggering an early refresh
+        self.queue_size = 50
+        self.queue_margin = 0.5
+        self._candidate_idx = None
+        self._min_U = np.inf
+        # number of hyperparameters fits between two global optimizations
+        self._full_opt_every = 5
+        self._iter_since_full_opt = 0
         
     #Function determining the U criterion of AK
-    def compute_U(self,my_krig,list_id_evaluated):
+    def compute_U(self,predictor,idx=None):
         """
-        Function computing the infill criterion
+        Function computing the infill criterion, evaluated samples are given an infinite value
         
-        :my_krig: Kriging model, :py:class:`openturns.KrigingResult`
+        :predictor: Kriging predictor, :py:class:`_KrigingPredictor`
         
-        :list_id_evaluated: list of evaluated :py:class:`openturns.Sample`
+        :idx: array of indices of the samples on which the criterion is computed, all samples if None
+        """
+        return predictor.compute_u(float(self.S), self._is_evaluated(idx), idx)
+
+    #Function resetting the evaluated samples
+    def _reset_evaluated(self,nb_evaluated=0):
         """
-        y_pred = np.array(my_krig.getConditionalMean(self.samples)).reshape(-1)
-        y_var_pred = np.array(my_krig.getConditionalMarginalVariance(self.samples)).reshape(-1)
+        Function resetting the evaluated samples to the first samples
         
-        list_id_non_evaluated = np.setdiff1d(np.arange(self.n_MC),list_id_evaluated)
-        U = np.zeros(self.n_MC)
+        :nb_evaluated: integer, number of first samples that are evaluated
+        """
+        if self.use_packed_mask:
+            self._evaluated_mask = None
+            self._eval_bits = np.zeros((self.n_MC+7)//8, dtype=np.uint8)
+            self._mark_evaluated(np.arange(nb_evaluated))
+        else:
+            self._eval_bits = None
+            self._evaluated_mask = np.zeros(self.n_MC, dtype=bool)
+            self._evaluated_mask[:nb_evaluated] = True
+
+    #Function flagging evaluated samples
+    def _mark_evaluated(self,idx):
+        """
+        Function flagging samples as evaluated
         
-        U[list_id_non_evaluated] = np.abs(y_pred[list_id_non_evaluated] - self.S)/np.sqrt(y_var_pred[list_id_non_evaluated])
+        :idx: array of indices of the samples
+        """
+        if self.use_packed_mask:
+            idx = np.atleast_1d(np.asarray(idx, dtype=np.intp))
+            np.bitwise_or.at(self._eval_bits, idx >> 3, np.left_shift(1, idx & 7).astype(np.uint8))
+        else:
+            self._evaluated_mask[idx] = True
+
+    #Function testing whether samples are evaluated
+    def _is_evaluated(self,idx=None):
+        """
+        Function returning a boolean array telling which samples are evaluated
         
-        if len(list_id_evaluated)>0:
-            U[list_id_evaluated] = 5e5
-        return U
+        :idx: array of indices of the samples, all samples if None
+        """
+        if not self.use_packed_mask:
+            return self._evaluated_mask if idx is None else self._evaluated_mask[idx]
+        if idx is None:
+            # one byte per sample, as the boolean mask
+            return np.unpackbits(self._eval_bits, count=self.n_MC, bitorder='little').view(bool)
+        idx = np.asarray(idx, dtype=np.intp)
+        return ((self._eval_bits[idx >> 3] >> (idx & 7)) & 1).astype(bool)
+
+    #Function restricting the search of infill points to the samples close to the limit state
+    def _update_candidates(self,predictor):
+        """
+        Function computing the U criterion on all samples and keeping as candidates the
+        `queue_size` non evaluated samples with the lowest U among those whose predicted
+        response lies within `band_width` standard deviations of the threshold
+        
+        :predictor: Kriging predictor, :py:class:`_KrigingPredictor`
+        
+        Returns:
+            U: array of U criterion values of the candidates
+        """
+        U = self.compute_U(predictor)
+        
+        width = max(self.band_width, self.U_criterion)
+        candidates = np.flatnonzero(U < width)
+        if candidates.size > self.queue_size:
+            candidates = candidates[np.argpartition(U[candidates], self.queue_size-1)[:self.queue_size]]
+        self._candidate_idx = candidates
+        self._min_U = U[candidates].min() if candidates.size > 0 else np.inf
+        return U[candidates]
+
+    #Function searching the infill points among the candidate samples
+    def _search_infill_points(self,predictor,nb_max,refresh):
+        """
+        Function computing the U criterion on the candidate samples and selecting the infill points
+        
+        The candidates are refreshed when required, when none of them is below the U criterion
+        threshold, so that convergence is always checked on all samples, or when their lowest U
+        exceeds the lowest U at the last refresh by more than `queue_margin`.
+        
+        :predictor: Kriging predictor, :py:class:`_KrigingPredictor`
+        
+        :nb_max: integer, maximum number of infill points
+        
+        :refresh: boolean, whether to refresh the candidate samples
+        
+        Returns:
+            id_opt_U: array of indices of the infill points
+            min_U: minimum of the U criterion
+        """
+        if refresh or self._candidate_idx is None or self._candidate_idx.size == 0:
+            U = self._update_candidates(predictor)
+        else:
+            U = self.compute_U(predictor, self._candidate_idx)
+            if U.size == 0 or U.min() >= min(self.U_criterion, self._min_U + self.queue_margin):
+                U = self._update_candidates(predictor)
+        
+        if U.size == 0:
+            return np.empty(0, dtype=int), np.inf
+        return self._select_infill_points(U, nb_max, self._candidate_idx), U.min()
+
+    #Function selecting the infill points
+    def _select_infill_points(self,U,nb_max,idx=None):
+        """
+        Function selecting a batch of samples with the lowest U criterion
+        
+        Candidates closer than `batch_min_distance` in the standard space to a
+        better candidate of the batch are discarded.
+        
+        :U: array of U criterion values of the samples
+        
+        :nb_max: integer, maximum number of points in the batch
+        
+        :idx: array of indices of the samples corresponding to U, all samples if None
+        """
+        batch_size = max(1, min(self.batch_size, nb_max))
+        nb_candidates = min(10*batch_size, U.size)
+        candidates = np.argpartition(U, nb_candidates-1)[:nb_candidates]
+        candidates = candidates[np.argsort(U[candidates])]
+        candidates = candidates[(U[candidates] < self.U_criterion) | (np.arange(nb_candidates) == 0)]
+        if idx is not None:
+            candidates = idx[candidates]
+        if batch_size == 1 or candidates.size == 1:
+            return candidates[:1]
+        
+        std_candidates = np.asarray(self._isoprobtrans(ot.Sample(self._samples_np[candidates])))
+        tree = cKDTree(std_candidates)
+        discarded = np.zeros(candidates.size, dtype=bool)
+        batch = []
+        for i in range(candidates.size):
+            if discarded[i]:
+                continue
+            batch.append(candidates[i])
+            if len(batch) == batch_size:
+                break
+            discarded[tree.query_ball_point(std_candidates[i], self.batch_min_distance)] = True
+        return np.array(batch)
+
+    #Function optimizing the hyperparameters of the kriging model
+    def _fit_kriging(self,cov_model,starting_point):
+        """
+        Function fitting the Kriging model on the current DoE
+        
+        The hyperparameters are optimized by L-BFGS started from the previous optimum. The global
+        DIRECT optimization is used every `_full_opt_every` fits, or when L-BFGS fails.
+        
+        :cov_model: covariance model of kriging
+        
+        :starting_point: starting point of the hyperparameters optimization
+        """
+        full_opt = self._iter_since_full_opt+1 >= self._full_opt_every
+        if not full_opt:
+            try:
+                my_krig = self._optimize_kriging(cov_model, ot.NLopt('LD_LBFGS'), starting_point)
+            except Exception:
+                full_opt = True
+        
+        if full_opt:
+            my_krig = self._optimize_kriging(cov_model, ot.NLopt('GN_DIRECT'), starting_point)
+            self._iter_since_full_opt = 0
+        else:
+            self._iter_since_full_opt += 1
+        return my_krig
+
+    def _optimize_kriging(self,cov_model,solver_kriging,starting_point):
+        """
+        Function running the Kriging algorithm with a given hyperparameters optimizer
+        
+        Returns:
+            my_krig: :py:class:`openturns.KrigingResult`
+        """
+        algokriging = ot.KrigingAlgorithm(self.DoE_inputs, 
+                                          self.DoE_responses,
+                                          cov_model,
+                                          self.basis)
+        
+        solver_kriging.setStartingPoint(starting_point)
+        algokriging.setOptimizationAlgorithm(solver_kriging)
+        algokriging.setOptimizationBounds(ot.Interval([0.01]*self.dim, [100]*self.dim))
+        algokriging.run()
+        return algokriging.getResult()
+
+    #Function building the kriging model without optimizing the hyperparameters
+    def _freeze_kriging(self,cov_model):
+        """
+        Function building the Kriging model on the current DoE with fixed hyperparameters
+        
+        :cov_model: covariance model of kriging with fitted hyperparameters
+        """
+        algokriging = ot.KrigingAlgorithm(self.DoE_inputs, 
+                                          self.DoE_responses,
+                                          cov_model,
+                                          self.basis)
+        algokriging.setOptimizeParameters(False)
+        algokriging.run()
+        return algokriging.getResult()
     
     @abstractmethod
     def generate_samples_and_weights(self):
@@ -92,12 +806,22 @@ class AK_Algorithm(ABC):
         
         """
         self.samples, weights = self.generate_samples_and_weights()
+        self._samples_np = np.asarray(self.samples)
+        weights = np.asarray(weights, dtype=np.float64)
+        self._iter_since_full_opt = 0
         
         # Generation of DoE
         self.DoE_inputs = self.samples[0:self.n_DoE]
         # Calculation of True function of the DoE
         self.DoE_responses = self.limit_state_function(self.DoE_inputs)
-        list_id_samples_evaluated = [i for i in range(self.n_DoE)]
+        self._reset_evaluated(self.n_DoE)
+        
+        # Buffers holding the DoE over the whole simulation budget
+        doe_x = np.empty((self.n_DoE+self.max_sim, self.dim))
+        doe_y = np.empty((self.n_DoE+self.max_sim, 1))
+        doe_x[:self.n_DoE] = np.asarray(self.DoE_inputs)
+        doe_y[:self.n_DoE] = np.asarray(self.DoE_responses)
+        n_cur = self.n_DoE
 
         # Definition of Kriging algorithm
         algokriging = ot.KrigingAlgorithm(self.DoE_inputs, 
@@ -107,61 +831,97 @@ class AK_Algorithm(ABC):
         algokriging.run()
         my_krig = algokriging.getResult()
         updated_cov = my_krig.getCovarianceModel()
+        predictor = _KrigingPredictor(updated_cov, self.basis, self.DoE_inputs, self.DoE_responses, self._samples_np, len(doe_x))
 
-        U_y_pred = self.compute_U(my_krig,list_id_samples_evaluated)
-        id_opt_U = np.argmin(U_y_pred)
-        current_min_U = U_y_pred[id_opt_U]
+        self._candidate_idx = None
+        id_opt_U, current_min_U = self._search_infill_points(predictor, self.max_sim, True)
 
+        nb_iter = 0
         nb_pt_sim = 0
-        list_id_samples_evaluated.append(id_opt_U)
+        nb_pt_fitted = 0
+        self._mark_evaluated(id_opt_U)
         if self.verbose == True:
             print('current_min_U', '| Nb_sim',' | Probability estimate', ' | Coefficient of variation')
         
         while nb_pt_sim<self.max_sim and current_min_U < self.U_criterion:
-                #evaluation of true function
-                x_new = self.samples[id_opt_U]
-                y_new = self.limit_state_function(x_new)
+                #evaluation of true function on the batch
+                x_new = self._samples_np[id_opt_U]
+                y_new = np.asarray(self.limit_state_function(ot.Sample(x_new)))
 
-                self.DoE_inputs.add(x_new)
-                self.DoE_responses.add(y_new)
+                doe_x[n_cur:n_cur+len(id_opt_U)] = x_new
+                doe_y[n_cur:n_cur+len(id_opt_U)] = y_new
+                n_cur = n_cur+len(id_opt_U)
+                nb_pt_sim = nb_pt_sim+len(id_opt_U)
                 
-                # Definition of Kriging model
-                startingPoint = updated_cov.getScale()
-                algokriging = ot.KrigingAlgorithm(self.DoE_inputs, 
-                                                  self.DoE_responses,
-                                                  updated_cov,
-                                                  self.basis)
-                
-                solver_kriging = ot.NLopt('GN_DIRECT')
-                solver_kriging.setStartingPoint(startingPoint)
-                algokriging.setOptimizationAlgorithm(solver_kriging)
-                algokriging.setOptimizationBounds(ot.Interval([0.01]*self.dim, [100]*self.dim))
-                algokriging.run()
-
-                my_krig = algokriging.getResult()
-                updated_cov = my_krig.getCovarianceModel()
+                if nb_pt_sim - nb_pt_fitted >= self.hyperparameters_update_period:
+                    # Definition of Kriging model
+                    self.DoE_inputs = ot.Sample(doe_x[:n_cur])
+                    self.DoE_responses = ot.Sample(doe_y[:n_cur])
+                    my_krig = self._fit_kriging(updated_cov, updated_cov.getScale())
+                    updated_cov = my_krig.getCovarianceModel()
+                    predictor = _KrigingPredictor(updated_cov, self.basis, doe_x[:n_cur], doe_y[:n_cur], self._samples_np, len(doe_x))
+                    nb_pt_fitted = nb_pt_sim
+                else:
+                    # Rank-one updates of the Kriging model with frozen hyperparameters
+                    for i in range(len(id_opt_U)):
+                        predictor.add_point(x_new[i], y_new[i])
 
                 # computation of U
-                U_y_pred = self.compute_U(my_krig,list_id_samples_evaluated)
-                id_opt_U = np.argmin(U_y_pred)
-                current_min_U = U_y_pred[id_opt_U]
-                nb_pt_sim = nb_pt_sim+1
-                list_id_samples_evaluated.append(id_opt_U)
-
-                y = my_krig.getConditionalMean(self.samples)
-                I = [self.operator(y[i][0],self.S) for i in range(self.n_MC)]
-                int_I = [int(i) for i in I]
-                Pf = 1/self.n_MC*np.sum(np.array(int_I)*weights)
-
-                self.proba = Pf
+                nb_iter = nb_iter+1
+                id_opt_U, current_min_U = self._search_infill_points(predictor, self.max_sim-nb_pt_sim,
+                                                                     nb_iter % self.band_refresh_period == 0)
+                self._mark_evaluated(id_opt_U)
                 self.nb_eval = self.n_DoE+nb_pt_sim
-                self.kriging_model = my_krig
         
                 if self.verbose == True:
+                    y, _ = predictor.predict_samples()
+                    Pf = _weighted_indicator(y, float(self.S), weights, self._op_code)/self.n_MC
                     print('{:9e}'.format(current_min_U),' | ','{:5d}'.format(int(nb_pt_sim)),' |      ','{:11e}'.format(Pf),'   |      ','{:11e}'.format(self.cv))
         
+        self.nb_eval = self.n_DoE+nb_pt_sim
+        
+        if nb_pt_fitted != nb_pt_sim:
+            # Last points were added by rank-one updates
+            self.DoE_inputs = ot.Sample(doe_x[:n_cur])
+            self.DoE_responses = ot.Sample(doe_y[:n_cur])
+            my_krig = self._freeze_kriging(updated_cov)
+        self.kriging_model = my_krig
+        
+        # Failure probability estimated with the final Kriging model returned by getKrigingModel
+        y = np.asarray(my_krig.getConditionalMean(self.samples)).ravel()
+        self.proba = _weighted_indicator(y, float(self.S), weights, self._op_code)/self.n_MC
         return
 
+    #Function running independent replications of the algorithm
+    def run_ensemble(self,n_runs,n_workers=None):
+        """
+        Function running independent replications of compute_proba in parallel processes,
+        e.g. to estimate the variability of the failure probability estimate
+        
+        Each replication uses its own seed of the OpenTURNS random generator, drawn from the
+        current state of the generator, so that the replications are reproducible. The worker
+        processes are spawned, which is supported on all platforms and safe with the threads of
+        OpenTURNS and numba: the algorithm, including the limit state function, must be picklable
+        (e.g. a :py:class:`openturns.PythonFunction` wrapping a module level function), and scripts
+        must call run_ensemble under `if __name__ == '__main__':`. The state of this instance is
+        left unchanged.
+        
+        :n_runs: integer, number of replications
+        
+        :n_workers: integer, number of worker processes, number of CPUs if None
+        
+        Returns:
+            list of (failure probability, coefficient of variation, number of evaluations) per replication
+        """
+        seeds = [int(ot.RandomGenerator.IntegerGenerate(2**31)) for i in range(n_runs)]
+        # copy of the algorithm without the results of previous runs, which are not sent to the workers
+        algorithm = copy.copy(self)
+        algorithm.samples = algorithm._samples_np = None
+        algorithm._evaluated_mask = algorithm._eval_bits = algorithm._candidate_idx = None
+        algorithm.DoE_inputs = algorithm.DoE_responses = algorithm.kriging_model = None
+        with multiprocessing.get_context('spawn').Pool(n_workers) as pool:
+            return pool.map(_ensemble_worker, [(algorithm, seed) for seed in seeds])
+
     #Accessor to the number of evaluated samples
     def getSimBudget(self):
         """
@@ -236,16 +996,58 @@ class AK_ISAlgorithm(AK_Algorithm):
     :u_criterion: float, threshold value for `u criterion`
     
     :verbose: verbosity parameter 
+    
+    :batch_size: integer, maximum number of infill points evaluated between two Kriging updates
+    
+    Attributes that can be modified after construction:
+    
+    :hyperparameters_update_period: integer, number of infill points between two optimizations of
+        the Kriging hyperparameters, 5 by default
+    
+    :batch_min_distance: float, minimal distance in the standard space between two infill points
+        of a batch, 0.5 by default
+    
+    :band_width: float, half-width, in Kriging standard deviations, of the band around the limit
+        state where infill points are searched, 3 by default
+    
+    :band_refresh_period: integer, number of iterations between two searches of the band on all
+        samples, 10 by default
+    
+    :queue_size: integer, maximal number of candidate samples kept between two band searches,
+        50 by default
+    
+    :queue_margin: float, increase of the lowest U criterion of the candidates triggering an
+        early band search, 0.5 by default
+    
+    :use_packed_mask: boolean, whether the evaluated samples are stored as a bitset rather than
+        a boolean mask, dividing the storage by 8, False by default
+    
+    :numpy_sampling: boolean, whether the importance samples are drawn with a NumPy generator
+        seeded by the OpenTURNS one, faster but giving different samples for a given seed than
+        the OpenTURNS generator, False by default
         
     """
 	
-    def __init__(self,event,n_IS,n_DoE,sim_budget,basis,cov_model,FORM_solver,u_criterion=2,verbose = False):
+    def __init__(self,event,n_IS,n_DoE,sim_budget,basis,cov_model,FORM_solver,u_criterion=2,verbose = False,batch_size = 4):
 
-        super().__init__(event,n_IS,n_DoE,sim_budget,basis,cov_model,u_criterion,verbose)
+        super().__init__(event,n_IS,n_DoE,sim_budget,basis,cov_model,u_criterion,verbose,batch_size)
 
         self.FORM_solver = FORM_solver
         self.inv_isoprobtrans = self.distrib.getInverseIsoProbabilisticTransformation()
         self.FORM_result = None
+        self._form_cache = None
+        # draw the importance samples with a NumPy generator seeded by the OpenTURNS one rather
+        # than with the OpenTURNS generator, faster but giving different samples for a given seed
+        self.numpy_sampling = False
+
+    #Function discarding the cached FORM result
+    def invalidate_form_cache(self):
+        """
+        Function discarding the cached FORM result, so that FORM is run again at the next
+        call to compute_proba
+        
+        """
+        self._form_cache = None
     
     def generate_samples_and_weights(self):
         """
@@ -256,31 +1058,40 @@ class AK_ISAlgorithm(AK_Algorithm):
         
         Returns:
             samples: :py:class:`openturns.Sample` of generated samples in physical space
-            weights: list of weights corresponding to each sample
+            weights: array of weights corresponding to each sample
         """
-        # Computation of FORM
-        vect = ot.RandomVector(self.distrib)
-        G = ot.CompositeRandomVector(self.limit_state_function, vect)
-        event = ot.ThresholdEvent(G,self.operator, self.S)
-        
-        #FORM algorithm to get the MPP
-        algo = ot.FORM(self.FORM_solver, event, self.distrib.getMean())
-        algo.run()
-        result_FORM = algo.getResult()
-        if self.verbose == True:
-            print('Estimation of probability with FORM',result_FORM.getEventProbability())
+        # Computation of FORM, reused from previous calls on the same event
+        starting_point = self.distrib.getMean()
+        key = (id(self.event), tuple(starting_point))
+        if self._form_cache is not None and self._form_cache[0] == key:
+            result_FORM = self._form_cache[1]
+        else:
+            vect = ot.RandomVector(self.distrib)
+            G = ot.CompositeRandomVector(self.limit_state_function, vect)
+            event = ot.ThresholdEvent(G,self.operator, self.S)
+            
+            #FORM algorithm to get the MPP
+            algo = ot.FORM(self.FORM_solver, event, starting_point)
+            algo.run()
+            result_FORM = algo.getResult()
+            if self.verbose == True:
+                print('Estimation of probability with FORM',result_FORM.getEventProbability())
+            self._form_cache = (key, result_FORM)
         self.FORM_result = result_FORM
         
-        # Derivation of auxiliary density and sampling
-        myImportance = ot.Normal(self.dim)
-        myImportance.setMu(self.FORM_result.getStandardSpaceDesignPoint())
-        samples_std_space = myImportance.getSample(self.n_MC)
-        samples_std_space = samples_std_space
-        samples = self.inv_isoprobtrans(samples_std_space)
+        # Sampling of the auxiliary density, standard normal centered on the design point
+        mu = np.asarray(self.FORM_result.getStandardSpaceDesignPoint())
+        if self.numpy_sampling:
+            rng = np.random.default_rng(int(ot.RandomGenerator.IntegerGenerate(2**31)))
+            E = rng.standard_normal((self.n_MC, self.dim))
+        else:
+            E = np.asarray(ot.Normal(self.dim).getSample(self.n_MC))
+        samples_std_space = E + mu
+        samples = self.inv_isoprobtrans(ot.Sample(samples_std_space))
         
-        #Calculation of weights in standard space
-        norm_law = ot.Normal(np.zeros(self.dim), np.ones(self.dim), ot.IdentityMatrix(self.dim))
-        weights = [norm_law.computePDF(x)/myImportance.computePDF(x) for x in samples_std_space]
+        #Calculation of weights in standard space: ratio of the standard normal density
+        #and of the importance density, both with identity covariance
+        weights = np.exp(0.5*(np.sum(E*E, axis=1) - np.sum(samples_std_space**2, axis=1)))
         
         return samples, weights
 
@@ -304,11 +1115,36 @@ class AK_MCSAlgorithm(AK_Algorithm):
     :u_criterion: float, threshold value for `u criterion`
     
     :verbose: verbosity parameter 
+    
+    :batch_size: integer, maximum number of infill points evaluated between two Kriging updates
+    
+    Attributes that can be modified after construction:
+    
+    :hyperparameters_update_period: integer, number of infill points between two optimizations of
+        the Kriging hyperparameters, 5 by default
+    
+    :batch_min_distance: float, minimal distance in the standard space between two infill points
+        of a batch, 0.5 by default
+    
+    :band_width: float, half-width, in Kriging standard deviations, of the band around the limit
+        state where infill points are searched, 3 by default
+    
+    :band_refresh_period: integer, number of iterations between two searches of the band on all
+        samples, 10 by default
+    
+    :queue_size: integer, maximal number of candidate samples kept between two band searches,
+        50 by default
+    
+    :queue_margin: float, increase of the lowest U criterion of the candidates triggering an
+        early band search, 0.5 by default
+    
+    :use_packed_mask: boolean, whether the evaluated samples are stored as a bitset rather than
+        a boolean mask, dividing the storage by 8, False by default
         
     """
     
-    def __init__(self,event,n_MC,n_DoE,sim_budget,basis, cov_model,u_criterion = 2,verbose = False):
-        super().__init__(event,n_MC,n_DoE,sim_budget,basis,cov_model,u_criterion,verbose)
+    def __init__(self,event,n_MC,n_DoE,sim_budget,basis, cov_model,u_criterion = 2,verbose = False,batch_size = 4):
+        super().__init__(event,n_MC,n_DoE,sim_budget,basis,cov_model,u_criterion,verbose,batch_size)
     
     def generate_samples_and_weights(self):
         """
@@ -356,17 +1192,28 @@ class AK_SSAlgorithm(AK_Algorithm):
     :u_criterion: float, threshold value for `u criterion`
     
     :verbose: verbosity parameter 
+    
+    Attributes that can be modified after construction:
+    
+    :hyperparameters_update_period: integer, number of infill points between two optimizations of
+        the Kriging hyperparameters, 5 by default
+    
+    :use_packed_mask: boolean, whether the evaluated samples are stored as a bitset rather than
+        a boolean mask, dividing the storage by 8, False by default
         
     """
     
     def __init__(self,event,n_SS,n_DoE,sim_budget,basis, cov_model,proposal_range = 1.,target_proba=0.5,cv_target = 0.05,u_criterion = 2,verbose = False):
         super().__init__(event,n_SS,n_DoE,sim_budget,basis,cov_model,u_criterion,verbose)
 
+        self.n_SS = n_SS
         self.cv = 1e4
         self.cv_target = cv_target
         self.proposal_range = proposal_range
         self.target_proba = target_proba
         self.discrepancy_LHS = 5
+        self._marginal_means = np.array([self.distrib.getMarginal(i).getMean()[0] for i in range(self.dim)])
+        self._marginal_stds = np.array([self.distrib.getMarginal(i).getStandardDeviation()[0] for i in range(self.dim)])
 
     def generate_samples_and_weights(self):
         return None, None
@@ -378,11 +1225,13 @@ class AK_SSAlgorithm(AK_Algorithm):
         
         
         """                       
-        #Generation of DoE using LHS
-        liste_densite = []
-        for i in range(self.distrib.getDimension()):
-            liste_densite.append(ot.Uniform(self.distrib.getMarginal(i).getMean()[0]- self.discrepancy_LHS*self.distrib.getMarginal(i).getStandardDeviation()[0],
-                                            self.distrib.getMarginal(i).getMean()[0]+ self.discrepancy_LHS*self.distrib.getMarginal(i).getStandardDeviation()[0]))
+        # the number of samples grows and the coefficient of variation decreases along the iterations
+        self.n_MC = self.n_SS
+        self.cv = 1e4
+        
+        #Generation of DoE using LHS, on discrepancy_LHS standard deviations around the marginal means
+        liste_densite = [ot.Uniform(m - self.discrepancy_LHS*sd, m + self.discrepancy_LHS*sd)
+                         for m, sd in zip(self._marginal_means, self._marginal_stds)]
 
         dist_LHS = ot.ComposedDistribution(liste_densite)   
         exp_LHS = ot.LHSExperiment(dist_LHS,self.n_DoE)    
@@ -394,6 +1243,8 @@ class AK_SSAlgorithm(AK_Algorithm):
         
         current_iter = 1
         nb_pt_sim=0
+        nb_pt_fitted=0
+        self._iter_since_full_opt = 0
         print('current_iter', '| Nb_sim',' | Probability estimate', ' | Coefficient of variation')
 
         while (self.cv>self.cv_target and nb_pt_sim<self.max_sim) :                
@@ -402,7 +1253,7 @@ class AK_SSAlgorithm(AK_Algorithm):
                 myExperiment = ot.MonteCarloExperiment(self.distrib, self.n_MC)
                 self.samples = myExperiment.generate()
                 
-                list_id_samples_evaluated=[]
+                self._reset_evaluated()
                 
                 #Generation of Kriging model
                     
@@ -417,23 +1268,26 @@ class AK_SSAlgorithm(AK_Algorithm):
                 algokriging.setOptimizationBounds(ot.Interval([0.01]*self.dim, [100]*self.dim))
                 algokriging.run()
                 my_krig = algokriging.getResult()
-                metamodel = my_krig.getMetaModel()
 
                 updated_cov = my_krig.getCovarianceModel()
-                U_y_pred = self.compute_U(my_krig,list_id_samples_evaluated)
+                predictor = _KrigingPredictor(updated_cov, self.basis, self.DoE_inputs, self.DoE_responses, self.samples, self.n_DoE+self.max_sim)
+                U_y_pred = self.compute_U(predictor)
                 id_opt_U=np.argmin(U_y_pred)
                 current_min_U = U_y_pred[id_opt_U]
-                list_id_samples_evaluated.append(id_opt_U)
+                self._mark_evaluated(id_opt_U)
                 
             else: # Add points to current first iter of MC algo
                 samples_additional_MC = myExperiment.generate()
                 self.samples = ot.Sample(np.concatenate((self.samples,samples_additional_MC)))
                 self.n_MC = self.samples.getSize()
+                predictor.set_samples(self.samples)
+                # None of the new subset samples belongs to the DoE
+                self._reset_evaluated()
                 #Compute u criterion on these samples
-                U_y_pred = self.compute_U(my_krig,list_id_samples_evaluated)
+                U_y_pred = self.compute_U(predictor)
                 id_opt_U=np.argmin(U_y_pred)
                 current_min_U = U_y_pred[id_opt_U]
-                list_id_samples_evaluated.append(id_opt_U)
+                self._mark_evaluated(id_opt_U)
             
             while nb_pt_sim<self.max_sim and current_min_U < self.U_criterion:
                     #evaluation of true function
@@ -442,33 +1296,26 @@ class AK_SSAlgorithm(AK_Algorithm):
 
                     self.DoE_inputs.add(x_new)
                     self.DoE_responses.add(y_new)
-                    # Definition of Kriging model
+                    nb_pt_sim = nb_pt_sim+1
 
-                    startingPoint = updated_cov.getScale()
-                    algokriging = ot.KrigingAlgorithm(self.DoE_inputs, 
-                                                      self.DoE_responses,
-                                                      self.cov_model,
-                                                      self.basis)
+                    if nb_pt_sim % self.hyperparameters_update_period == 0:
+                        # Definition of Kriging model
+                        my_krig = self._fit_kriging(self.cov_model, updated_cov.getScale())
+                        nb_pt_fitted = nb_pt_sim
+                        updated_cov = my_krig.getCovarianceModel()
+                        predictor = _KrigingPredictor(updated_cov, self.basis, self.DoE_inputs, self.DoE_responses, self.samples, self.n_DoE+self.max_sim)
+                    else:
+                        # Rank-one update of the Kriging model with frozen hyperparameters
+                        predictor.add_point(x_new, y_new)
                     
-                    solver_kriging = ot.NLopt('GN_DIRECT')
-                    solver_kriging.setStartingPoint(startingPoint)
-                    algokriging.setOptimizationAlgorithm(solver_kriging)
-                    algokriging.setOptimizationBounds(ot.Interval([0.01]*self.dim, [100]*self.dim))
-                    algokriging.run()
-                    my_krig = algokriging.getResult()
-                    metamodel = my_krig.getMetaModel()
-            
-                    updated_cov = my_krig.getCovarianceModel()
                     # computation of U
-                    U_y_pred = self.compute_U(my_krig,list_id_samples_evaluated)
+                    U_y_pred = self.compute_U(predictor)
                     id_opt_U = np.argmin(U_y_pred)
                     current_min_U = U_y_pred[id_opt_U]
-                    nb_pt_sim = nb_pt_sim+1
-                    list_id_samples_evaluated.append(id_opt_U)
+                    self._mark_evaluated(id_opt_U)
                     
 
                     self.nb_eval = self.n_DoE+nb_pt_sim
-                    self.kriging_model = my_krig
 
                     '''if self.verbose == True:
                         if nb_pt_sim == 1:
@@ -478,13 +1325,14 @@ class AK_SSAlgorithm(AK_Algorithm):
                         else:
                             print('{:9e}'.format(current_min_U),' | ','{:5d}'.format(int(nb_pt_sim)))'''
 
-            #run of subsetsampling algorithm
-            
+            #run of subsetsampling algorithm on the kriging mean, evaluated on all the samples of a step at once
+            metamodel = ot.PythonFunction(self.dim, 1, func_sample=predictor.predict_mean)
             inputVector = ot.RandomVector(self.distrib)
             Y_kr = ot.CompositeRandomVector(metamodel, inputVector)
             my_eventkriging = ot.ThresholdEvent(Y_kr,self.operator,self.S)               
             SS_kr = ot.SubsetSampling(my_eventkriging,self.proposal_range,self.target_proba)
-            SS_kr.setMaximumOuterSampling(self.n_MC)
+            SS_kr.setMaximumOuterSampling(1)
+            SS_kr.setBlockSize(self.n_MC)
             SS_kr.setKeepSample(True)
             SS_kr.run()
             res = SS_kr.getResult()
@@ -496,4 +1344,8 @@ class AK_SSAlgorithm(AK_Algorithm):
             
             current_iter+=1
 
+        if nb_pt_fitted != nb_pt_sim:
+            # Last points were added by rank-one updates
+            my_krig = self._freeze_kriging(updated_cov)
+        self.kriging_model = my_krig
         return 
\ No newline at end of file
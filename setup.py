@@ -32,7 +32,9 @@ setup(
     setup_requires=['pytest-runner'],
     
     install_requires=['numpy',
+                      'scipy',
                       'openturns'],
+    extras_require={'numba': ['numba']},
     tests_require=['pytest'],
 
 )
\ No newline at end of file
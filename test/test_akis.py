@@ -30,9 +30,8 @@ def non_lin_osc(x):
     G = 3*r - np.abs(2*F1/(m*omega**2)*np.sin(omega*t1/2))
     return [G]
 
-# Definition of pythonfunction
-
-def test_akis():
+# Definition of AK-IS algorithm
+def build_akis():
     my_non_lin_osc = ot.PythonFunction(6, 1, non_lin_osc)
     vect = ot.RandomVector(dist_x)
     G = ot.CompositeRandomVector(my_non_lin_osc, vect)
@@ -45,18 +44,90 @@ def test_akis():
     n_DoE_osc = 40
     sim_budget_osc = 200
     verbose = False
-    my_AK_non_lin_osc = otak.AK_ISAlgorithm(event_osc,
-                                        n_IS_osc,
-                                        n_DoE_osc,
-                                        sim_budget_osc,
-                                        basis,
-                                        covarianceModel,
-                                        ot.Cobyla(),
-                                        2,
-                                        verbose)
-    
+    return otak.AK_ISAlgorithm(event_osc,
+                               n_IS_osc,
+                               n_DoE_osc,
+                               sim_budget_osc,
+                               basis,
+                               covarianceModel,
+                               ot.Cobyla(),
+                               2,
+                               verbose)
+
+def test_akis():
+    my_AK_non_lin_osc = build_akis()
     
     #computation of probability with AK-IS
     my_AK_non_lin_osc.compute_proba()
 
-    assert my_AK_non_lin_osc.getFailureProbability()== pytest.approx(0.0287,abs=1e-4)
\ No newline at end of file
+    assert my_AK_non_lin_osc.getFailureProbability()== pytest.approx(0.0287,abs=1e-4)
+
+def test_akis_ensemble():
+    #the random stream of the following tests is left unchanged
+    state = ot.RandomGenerator.GetState()
+    my_AK_non_lin_osc = build_akis()
+    
+    #independent replications of AK-IS, reproducible with the seed
+    ot.RandomGenerator.SetSeed(2)
+    results = my_AK_non_lin_osc.run_ensemble(2, 2)
+    ot.RandomGenerator.SetSeed(2)
+    results_again = my_AK_non_lin_osc.run_ensemble(2, 2)
+    ot.RandomGenerator.SetState(state)
+
+    assert results == results_again
+    assert results[0] != results[1]
+    for proba, cv, nb_eval in results:
+        assert proba == pytest.approx(0.0287, rel=0.2)
+
+def test_akis_form_cache():
+    #the random stream of the following tests is left unchanged
+    state = ot.RandomGenerator.GetState()
+    nb_calls = [0]
+    def counted_non_lin_osc(x):
+        nb_calls[0] += 1
+        return non_lin_osc(x)
+    event_osc = ot.ThresholdEvent(ot.CompositeRandomVector(ot.PythonFunction(6, 1, counted_non_lin_osc),
+                                                           ot.RandomVector(dist_x)), ot.Less(), 0.0)
+    basis = ot.ConstantBasisFactory(dim_inputs).build()
+    my_AK_non_lin_osc = otak.AK_ISAlgorithm(event_osc, 1000, 20, 20, basis,
+                                            ot.SquaredExponential([0.1]*dim_inputs, [1.0]), ot.Cobyla())
+
+    #first run, with FORM
+    my_AK_non_lin_osc.compute_proba()
+    nb_calls_FORM = nb_calls[0] - my_AK_non_lin_osc.getSimBudget()
+    assert nb_calls_FORM > 0
+
+    #second run, the FORM result is reused
+    nb_calls[0] = 0
+    my_AK_non_lin_osc.compute_proba()
+    assert nb_calls[0] == my_AK_non_lin_osc.getSimBudget()
+
+    #FORM is run again once the cache is invalidated
+    nb_calls[0] = 0
+    my_AK_non_lin_osc.invalidate_form_cache()
+    my_AK_non_lin_osc.compute_proba()
+    assert nb_calls[0] == my_AK_non_lin_osc.getSimBudget() + nb_calls_FORM
+    ot.RandomGenerator.SetState(state)
+
+def test_akis_numpy_sampling():
+    #the random stream of the following tests is left unchanged
+    state = ot.RandomGenerator.GetState()
+    my_AK_non_lin_osc = build_akis()
+    my_AK_non_lin_osc.n_MC = 1000
+    my_AK_non_lin_osc.numpy_sampling = True
+
+    #samples reproducible with the seed of the OpenTURNS generator
+    ot.RandomGenerator.SetSeed(3)
+    samples, weights = my_AK_non_lin_osc.generate_samples_and_weights()
+    ot.RandomGenerator.SetSeed(3)
+    samples_again, weights_again = my_AK_non_lin_osc.generate_samples_and_weights()
+    ot.RandomGenerator.SetState(state)
+    assert np.array_equal(np.asarray(samples), np.asarray(samples_again))
+    assert np.array_equal(weights, weights_again)
+
+    #weights equal to the ratio of the standard normal and importance densities
+    samples_std_space = dist_x.getIsoProbabilisticTransformation()(samples)
+    myImportance = ot.Normal(dim_inputs)
+    myImportance.setMu(my_AK_non_lin_osc.FORM_result.getStandardSpaceDesignPoint())
+    ratio = np.asarray(ot.Normal(dim_inputs).computePDF(samples_std_space)).ravel()/np.asarray(myImportance.computePDF(samples_std_space)).ravel()
+    assert weights == pytest.approx(ratio, rel=1e-8)
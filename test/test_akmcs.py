@@ -52,4 +52,19 @@ def test_akmcs():
 	#computation of probability with AK-MCS
 	my_AK_four_branch.compute_proba()
 
-	assert my_AK_four_branch.getFailureProbability()== pytest.approx(0.0044,abs=1e-4)
\ No newline at end of file
+	assert my_AK_four_branch.getFailureProbability()== pytest.approx(0.0044,abs=1e-4)
+
+def test_select_infill_points():
+	my_four_branch = ot.PythonFunction(3, 1, four_branch)
+	my_four_branch_6 = ot.ParametricFunction(my_four_branch, [2], [6])
+	Y = ot.CompositeRandomVector(my_four_branch_6, inputVector)
+	my_event4b = ot.ThresholdEvent(Y,ot.Less(),0.0)
+	basis = ot.ConstantBasisFactory(2).build()
+	my_AK_four_branch = otak.AK_MCSAlgorithm(my_event4b, 4, 1, 10, basis, ot.MaternModel(2), 2, False, 4)
+
+	#two near-duplicate samples with the lowest U criterion, of which only the best is in the batch
+	my_AK_four_branch._samples_np = np.array([[0., 0.], [0., 1e-3], [2., 2.], [-2., 2.]])
+	U = np.array([0.2, 0.1, 0.3, 5.])
+	batch = my_AK_four_branch._select_infill_points(U, 10)
+
+	assert list(batch) == [1, 2]
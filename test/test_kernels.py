@@ -0,0 +1,55 @@
+import openturns as ot
+import pytest
+import numpy as np
+from otak import otak
+
+pytest.importorskip('numba')
+
+rng = np.random.default_rng(1)
+n = 1000
+S = 0.5
+mean = rng.normal(size=n)
+var = rng.uniform(0., 1., size=n)
+var[:10] = 0.
+evaluated_mask = rng.uniform(size=n) < 0.1
+
+def test_compute_u():
+    U_numba = np.empty(n)
+    U_numpy = np.empty(n)
+    otak._compute_u(mean, var, S, evaluated_mask, U_numba)
+    otak._compute_u_numpy(mean, var, S, evaluated_mask, U_numpy)
+
+    assert np.array_equal(np.isinf(U_numba), np.isinf(U_numpy))
+    finite = np.isfinite(U_numpy)
+    assert U_numba[finite] == pytest.approx(U_numpy[finite])
+
+@pytest.mark.parametrize('operator', [ot.Less(), ot.LessOrEqual(), ot.Greater(), ot.GreaterOrEqual()])
+def test_weighted_indicator(operator):
+    #responses equal to the threshold distinguish strict and non strict operators
+    y = np.round(rng.normal(size=n), 1)
+    weights = rng.uniform(size=n)
+    op_code = otak._COMPARISON_OPERATORS.index(otak._get_class_name(operator))
+
+    expected = sum(w for yi, w in zip(y, weights) if operator(yi, S))
+    assert otak._weighted_indicator(y, S, weights, op_code) == pytest.approx(expected)
+    assert otak._weighted_indicator_numpy(y, S, weights, op_code) == pytest.approx(expected)
+
+@pytest.mark.parametrize('basis', [ot.Basis(), ot.ConstantBasisFactory(2).build(), ot.LinearBasisFactory(2).build()])
+def test_fused_u(basis):
+    DoE_inputs = rng.normal(size=(20, 2))
+    DoE_responses = np.sin(DoE_inputs).sum(axis=1, keepdims=True)
+    samples = rng.normal(size=(n, 2))
+    predictor = otak._KrigingPredictor(ot.SquaredExponential([1.]*2, [1.0]), basis, DoE_inputs, DoE_responses, samples)
+    predictor.add_point(samples[0], np.sin(samples[0]).sum())
+    mask = evaluated_mask.copy()
+    mask[0] = True
+
+    #fused computation, done while the prediction on all samples is not cached
+    U_fused = predictor.compute_u(S, mask)
+    mean, var = predictor.predict_samples()
+    U = np.empty(n)
+    otak._compute_u_numpy(mean, var, S, mask, U)
+
+    assert np.array_equal(np.isinf(U_fused), np.isinf(U))
+    finite = np.isfinite(U)
+    assert U_fused[finite] == pytest.approx(U[finite], rel=1e-6)
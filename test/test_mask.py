@@ -0,0 +1,54 @@
+import openturns as ot
+import numpy as np
+import otak
+from otak.otak import _KrigingPredictor
+
+# Definition of test case : Four Branchfunction
+dim_inputs = 2
+dist_x = ot.Normal([0.0, 0.0], [1., 1.], ot.CorrelationMatrix(dim_inputs))
+inputVector = ot.RandomVector(dist_x)
+
+#Definition of limit state function
+def four_branch(x):
+    x1 = x[0]
+    x2  = x[1]
+    k = 6
+    g1 = 3+0.1*(x1-x2)**2-(x1+x2)/np.sqrt(2)
+    g2 = 3+0.1*(x1-x2)**2+(x1+x2)/np.sqrt(2)
+    g3 = (x1-x2)+k/np.sqrt(2)
+    g4 =(x2-x1)+k/np.sqrt(2)
+    return [min((g1,g2,g3,g4))]
+
+def test_packed_mask():
+    ot.RandomGenerator.SetSeed(1)
+    my_four_branch = ot.PythonFunction(2, 1, four_branch)
+    Y = ot.CompositeRandomVector(my_four_branch, inputVector)
+    my_event4b = ot.ThresholdEvent(Y,ot.Less(),0.0)
+    basis = ot.ConstantBasisFactory(dim_inputs).build()
+    covarianceModel = ot.SquaredExponential([1.]*dim_inputs, [1.0])
+    n_MC = 1001
+    n_DoE = 20
+
+    my_AK = otak.AK_MCSAlgorithm(my_event4b, n_MC, n_DoE, 100, basis, covarianceModel)
+    my_AK._samples_np = np.asarray(dist_x.getSample(n_MC))
+    DoE_inputs = my_AK._samples_np[:n_DoE]
+    predictor = _KrigingPredictor(covarianceModel, basis, DoE_inputs, my_four_branch(ot.Sample(DoE_inputs)), my_AK._samples_np)
+    evaluated = np.random.default_rng(1).choice(np.arange(n_DoE, n_MC), 100, replace=False)
+
+    results = []
+    for use_packed_mask in (False, True):
+        my_AK.use_packed_mask = use_packed_mask
+        my_AK._reset_evaluated(n_DoE)
+        my_AK._mark_evaluated(evaluated)
+        my_AK._mark_evaluated(evaluated[0])
+        U = my_AK.compute_U(predictor)
+        U_subset = my_AK.compute_U(predictor, evaluated[:10])
+        my_AK._candidate_idx = None
+        id_opt_U, min_U = my_AK._search_infill_points(predictor, 100, True)
+        results.append((U, U_subset, id_opt_U, min_U))
+
+    assert np.isinf(results[0][0][:n_DoE]).all() and np.isinf(results[0][0][evaluated]).all()
+    assert np.array_equal(results[0][0], results[1][0])
+    assert np.isinf(results[1][1]).all()
+    assert np.array_equal(results[0][2], results[1][2])
+    assert results[0][3] == results[1][3]
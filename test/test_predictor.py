@@ -0,0 +1,103 @@
+import openturns as ot
+import pytest
+import numpy as np
+import otak
+from otak.otak import _KrigingPredictor
+ot.RandomGenerator.SetSeed(1)
+
+# Definition of test case : Four Branchfunction
+dim_inputs = 2
+dist_x = ot.Normal([0.0, 0.0], [1., 1.], ot.CorrelationMatrix(dim_inputs))
+inputVector = ot.RandomVector(dist_x)
+
+#Definition of limit state function
+def four_branch(x):
+    x1 = x[0]
+    x2  = x[1]
+    k = 6
+    g1 = 3+0.1*(x1-x2)**2-(x1+x2)/np.sqrt(2)
+    g2 = 3+0.1*(x1-x2)**2+(x1+x2)/np.sqrt(2)
+    g3 = (x1-x2)+k/np.sqrt(2)
+    g4 =(x2-x1)+k/np.sqrt(2)
+    return [min((g1,g2,g3,g4))]
+
+my_four_branch = ot.PythonFunction(2, 1, four_branch)
+Y = ot.CompositeRandomVector(my_four_branch, inputVector)
+my_event4b = ot.ThresholdEvent(Y,ot.Less(),0.0)
+basis = ot.ConstantBasisFactory(dim_inputs).build()
+
+def check_prediction(predictor, krig, X):
+    mean, var = predictor.predict(X)
+    assert mean == pytest.approx(np.asarray(krig.getConditionalMean(X)).ravel(), abs=1e-6)
+    assert var == pytest.approx(np.asarray(krig.getConditionalMarginalVariance(X)).ravel(), abs=1e-6)
+
+def test_predictor():
+    DoE_inputs = dist_x.getSample(15)
+    DoE_responses = my_four_branch(DoE_inputs)
+    X = dist_x.getSample(100)
+
+    algokriging = ot.KrigingAlgorithm(DoE_inputs, DoE_responses, ot.SquaredExponential([1.]*dim_inputs, [1.0]), basis)
+    algokriging.run()
+    my_krig = algokriging.getResult()
+    updated_cov = my_krig.getCovarianceModel()
+
+    #prediction right after the fit
+    predictor = _KrigingPredictor(updated_cov, basis, DoE_inputs, DoE_responses, X)
+    check_prediction(predictor, my_krig, X)
+
+    #prediction after rank-one updates, compared with the kriging model with frozen hyperparameters
+    my_AK = otak.AK_MCSAlgorithm(my_event4b, 100, 15, 10, basis, updated_cov)
+    x_new = dist_x.getSample(3)
+    y_new = my_four_branch(x_new)
+    for i in range(x_new.getSize()):
+        predictor.add_point(x_new[i], y_new[i])
+        DoE_inputs.add(x_new[i])
+        DoE_responses.add(y_new[i])
+    my_AK.DoE_inputs = DoE_inputs
+    my_AK.DoE_responses = DoE_responses
+    my_krig = my_AK._freeze_kriging(updated_cov)
+    check_prediction(predictor, my_krig, X)
+    mean, var = predictor.predict_samples()
+    assert mean == pytest.approx(np.asarray(my_krig.getConditionalMean(X)).ravel(), abs=1e-6)
+
+def test_predictor_singular():
+    #duplicated DoE points make the covariance matrix singular
+    DoE_inputs = dist_x.getSample(10)
+    DoE_inputs.add(DoE_inputs)
+    DoE_responses = my_four_branch(DoE_inputs)
+    predictor = _KrigingPredictor(ot.SquaredExponential([100.]*dim_inputs, [1.0]), basis, DoE_inputs, DoE_responses)
+
+    assert predictor.nugget > 0.
+    mean, var = predictor.predict(DoE_inputs)
+    assert np.all(np.isfinite(mean)) and np.all(var >= 0.)
+
+def test_predictor_ill_conditioned():
+    #squared exponential model with a scale close to the upper bound of the optimization
+    DoE_inputs = dist_x.getSample(30)
+    DoE_responses = my_four_branch(DoE_inputs)
+    covarianceModel = ot.SquaredExponential([50.]*dim_inputs, [1.6e5])
+    predictor = _KrigingPredictor(covarianceModel, basis, DoE_inputs[:25], DoE_responses[:25])
+    for i in range(25, 30):
+        predictor.add_point(DoE_inputs[i], DoE_responses[i])
+
+    my_AK = otak.AK_MCSAlgorithm(my_event4b, 100, 30, 10, basis, covarianceModel)
+    my_AK.DoE_inputs = DoE_inputs
+    my_AK.DoE_responses = DoE_responses
+    my_krig = my_AK._freeze_kriging(covarianceModel)
+
+    #the predictor interpolates the DoE at least as well as OpenTURNS
+    y = np.asarray(DoE_responses).ravel()
+    residual = np.abs(predictor.predict(DoE_inputs)[0] - y).max()
+    residual_ot = np.abs(np.asarray(my_krig.getConditionalMean(DoE_inputs)).ravel() - y).max()
+    assert residual <= max(residual_ot, 1e-3*np.abs(y).max())
+
+def test_akmcs_kriging_model():
+    ot.RandomGenerator.SetSeed(1)
+    my_AK_four_branch = otak.AK_MCSAlgorithm(my_event4b, 10000, 20, 200, basis,
+                                             ot.SquaredExponential([1.]*dim_inputs, [1.0]))
+    my_AK_four_branch.compute_proba()
+
+    #the failure probability is the one of the returned kriging model
+    y = np.asarray(my_AK_four_branch.getKrigingModel().getConditionalMean(my_AK_four_branch.getSamples())).ravel()
+    assert my_AK_four_branch.getFailureProbability() == pytest.approx(np.mean(y < 0.), rel=1e-12)
+    assert my_AK_four_branch.getFailureProbability() == pytest.approx(0.0044, abs=1e-3)